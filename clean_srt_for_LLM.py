@@ -1,5 +1,23 @@
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# 优先使用 C 实现的 orjson 解析配置，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+@lru_cache(maxsize=None)
+def _read_config(config_path, mtime):
+    """
+    读取并解析 JSON 配置文件，结果按 (路径, 修改时间) 缓存。
+    同一进程内重复加载未修改的配置文件时，直接返回缓存结果。
+    """
+    with open(config_path, 'rb') as f:
+        return _json_loads(f.read())
 
 def load_config(config_path):
     """
@@ -8,8 +26,7 @@ def load_config(config_path):
       - "srt_path": 输入 .srt 文件的路径
       - "out_path": 输出文本文件的路径
     """
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    config = _read_config(config_path, os.path.getmtime(config_path))
     
     # 简单校验必要字段是否存在
     if "srt_path" not in config or "out_path" not in config:
@@ -24,85 +41,109 @@ def get_srt_files(srt_path):
     遍历指定文件夹，找出所有 .srt 格式的文件。
     返回包含完整文件路径的列表。
     """
-    srt_files = []
-    
-    # 遍历文件夹中的所有文件
-    for filename in os.listdir(srt_path):
-        if filename.endswith('.srt'):
-            # 拼接完整路径并加入列表
-            full_path = os.path.join(srt_path, filename)
-            srt_files.append(full_path)
-    
-    return srt_files
+    # 使用 os.scandir 遍历，直接复用目录项自带的路径与文件类型信息，
+    # 避免额外的 os.path.join 和 stat 调用
+    with os.scandir(srt_path) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.name.endswith('.srt') and entry.is_file()
+        ]
 
-def parse_srt(srt_content):
-    """
-    解析 .srt 格式的字幕内容。
-    输入：完整的字幕文件字符串内容。
-    输出：列表，每个元素是一个字典 {'index': 序号, 'time': 时间戳, 'text': 字幕文本}。
-    """
-    subtitles = []
-    
-    # 按空行分割成不同的字幕块
-    blocks = srt_content.strip().split('\n\n')
-    
-    for block in blocks:
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            index = int(lines[0])
-            time_stamp = lines[1]
-            # 字幕文本可能有多行，将第3行及之后的所有行合并
-            text = '\n'.join(lines[2:])
-            
-            subtitles.append({
-                'index': index,
-                'time': time_stamp,
-                'text': text
-            })
-        except (ValueError, IndexError):
-            # 跳过格式不正确的块
-            continue
-            
-    return subtitles
-
-def format_for_llm(subtitles):
+# clean_srt_to_file() 解析字幕时使用的状态
+_INDEX = 0  # 等待字幕块序号行
+_TIME = 1   # 等待时间戳行
+_TEXT = 2   # 读取字幕文本行
+_SKIP = 3   # 跳过格式不正确的字幕块，直到遇到空行
+
+def clean_srt_to_file(srt_file, txt_file):
     """
-    将解析后的字幕列表转换为适合大模型阅读的纯文本。
+    将 .srt 字幕文件转换为适合大模型阅读的纯文本，并直接写入输出文件。
     策略：移除时间戳和序号，仅保留文本内容，并按顺序用换行符连接。
+    逐行读取并用一个小型状态机识别字幕块，文本行边读边写，
+    不在内存中保留整个文件或中间结果。
+    输入输出均以二进制方式处理，UTF-8 文本原样写出，省去解码和重新编码。
+    参数:
+      srt_file: 输入 .srt 文件的完整路径
+      txt_file: 输出文本文件的完整路径
     """
-    text_lines = []
-    
-    for item in subtitles:
-        # 只提取文本部分
-        text_lines.append(item['text'])
-    
-    # 将所有文本段落用换行符连接，形成清晰的段落结构
-    return '\n'.join(text_lines)
+    state = _INDEX
+    first = True
+
+    # 写入完成后才替换为正式文件名，中途出错不会留下被误认为“已是最新”的半成品
+    partial_file = txt_file + '.part'
 
+    try:
+        with open(srt_file, 'rb') as fin, open(partial_file, 'wb') as fout:
+            for line in fin:
+                # 只去掉行尾换行符，保留文本行本身的缩进和空白
+                line = line.rstrip(b'\r\n')
 
+                # 真正的空行才表示当前字幕块结束，仅含空白的行仍属于当前块
+                if not line:
+                    state = _INDEX
+                    continue
 
-def save_output(text, output_folder, filename):
+                if state == _INDEX:
+                    index = line.strip()
+                    if not index:
+                        # 字幕块之间多余的空白行
+                        continue
+                    # 序号行只需是纯数字即可，无需转换为整数；格式不正确的块则跳过
+                    state = _TIME if index.isdigit() else _SKIP
+                elif state == _TIME:
+                    state = _TEXT
+                elif state == _TEXT:
+                    # 字幕文本可能有多行，逐行用换行符连接
+                    if not first:
+                        fout.write(b'\n')
+                    fout.write(line)
+                    first = False
+
+        os.replace(partial_file, txt_file)
+    except BaseException:
+        # 写入失败或被中断时删除临时文件，不留下半成品
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        raise
+
+
+
+def is_up_to_date(src_file, dst_file):
     """
-    将处理后的文本保存到指定文件夹。
-    参数:
-      text: 要保存的文本内容
-      output_folder: 配置中指定的输出文件夹路径
-      filename: 具体的输出文件名 (例如 'result.txt')
+    判断输出文件是否已存在且不早于输入文件，即无需重新生成。
     """
-    # 确保输出文件夹存在，不存在则创建
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # 拼接完整的文件路径
-    full_path = os.path.join(output_folder, filename)
-    
-    with open(full_path, 'w', encoding='utf-8') as f:
-        f.write(text)
-    
-    print(f"文件已保存至: {full_path}")
+    return (os.path.exists(dst_file)
+            and os.path.getmtime(dst_file) >= os.path.getmtime(src_file))
+
+
+def _process_one(file_path, out_path):
+    """
+    处理单个 .srt 文件：解析 -> 格式化 -> 保存为同名 .txt 文件。
+    作为 main() 中进程池的任务单元，出错时只打印信息，不影响其他文件。
+    """
+    print(f"正在处理: {file_path}")
+    try:
+        # 构造输出文件名：保持原文件名主体，将 .srt 替换为 .txt
+        original_filename = os.path.basename(file_path)
+        if original_filename.endswith('.srt'):
+            new_filename = original_filename[:-4] + '.txt'
+        else:
+            new_filename = original_filename + '.txt'
+        
+        full_path = os.path.join(out_path, new_filename)
+        
+        # 输出文件已存在且比字幕文件新，说明已处理过，跳过
+        if is_up_to_date(file_path, full_path):
+            print(f"跳过: {full_path} 已是最新")
+            return
+        
+        # 解析字幕，格式化为大模型可用文本并立即保存
+        clean_srt_to_file(file_path, full_path)
+        print(f"文件已保存至: {full_path}")
+        
+    except Exception as e:
+        print(f"处理文件 {file_path} 时出错: {e}")
 
 
 def main():
@@ -110,7 +151,7 @@ def main():
     主函数：协调所有步骤。
     1. 读取配置获取输入文件夹和输出文件夹。
     2. 查找文件夹内所有 .srt 文件。
-    3. 遍历每个文件：解析 -> 格式化 -> 立即保存（文件名同原文件，后缀改为 .txt）。
+    3. 并行处理每个文件：边解析边格式化并写入（文件名同原文件，后缀改为 .txt）。
     """
     # 获取脚本所在目录
     script_dir = os.path.dirname(__file__)
@@ -118,6 +159,8 @@ def main():
     config = load_config('config.json')
     srt_path = os.path.join(script_dir,config["srt_path"])
     out_path = os.path.join(script_dir,config['out_path'])
+    # 确保输出文件夹存在，不存在则创建
+    os.makedirs(out_path, exist_ok=True)
     
     # 2. 获取所有 .srt 文件
     srt_files = get_srt_files(srt_path)
@@ -126,33 +169,13 @@ def main():
         print(f"在文件夹 '{srt_path}' 中未找到任何 .srt 文件。")
         return
 
-    print(f"找到 {len(srt_files)} 个字幕文件，开始逐个处理...")
+    print(f"找到 {len(srt_files)} 个字幕文件，开始并行处理...")
     
-    # 3. 遍历处理每个文件
-    for file_path in srt_files:
-        print(f"正在处理: {file_path}")
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 解析字幕
-            subtitles = parse_srt(content)
-            # 格式化为大模型可用文本
-            clean_text = format_for_llm(subtitles)
-            
-            # 构造输出文件名：保持原文件名主体，将 .srt 替换为 .txt
-            original_filename = os.path.basename(file_path)
-            if original_filename.endswith('.srt'):
-                new_filename = original_filename[:-4] + '.txt'
-            else:
-                new_filename = original_filename + '.txt'
-            
-            # 立即保存当前文件的处理结果
-            save_output(clean_text, out_path, new_filename)
-            
-        except Exception as e:
-            print(f"处理文件 {file_path} 时出错: {e}")
-            continue
+    # 3. 各文件相互独立，使用多进程并行处理
+    chunksize = max(1, len(srt_files) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(_process_one, srt_files,
+                          [out_path] * len(srt_files), chunksize=chunksize))
     
     print("所有任务完成！")
 
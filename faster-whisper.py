@@ -1,14 +1,31 @@
 import json
-from faster_whisper import WhisperModel
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 import os
+import re
+from functools import lru_cache
+
+# 优先使用 C 实现的 orjson 解析配置，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+@lru_cache(maxsize=None)
+def _read_config(config_path, mtime):
+    """
+    读取 JSON 配置文件并缓存解析结果。
+    mtime 作为缓存键的一部分，配置文件被修改后会重新读取。
+    """
+    with open(config_path, 'rb') as f:
+        return _json_loads(f.read())
 
 def load_config(config_path):
     """
     读取并解析 config.json 文件。
     """
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = _read_config(config_path, os.path.getmtime(config_path))
         return config
     except FileNotFoundError:
         print(f"错误：找不到配置文件 '{config_path}'。")
@@ -34,25 +51,45 @@ def ensure_directories(srt_dir, out_dir):
 
 
 
-def initialize_model(model_path):
+# 支持转录的音频文件扩展名（包含 subtitle_downloader.py 下载的常见音频格式）
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.webm', '.opus', '.ogg', '.flac')
+
+
+def get_audio_files(audio_path):
+    """
+    遍历指定文件夹，找出所有支持转录的音频文件。
+    返回按文件名排序的完整文件路径列表。
+    """
+    with os.scandir(audio_path) as entries:
+        return sorted(
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file()
+        )
+
+
+def initialize_model(model_path, compute_type="float16"):
     """
     根据模型路径加载本地 Whisper 模型。
-    固定使用 cuda 设备和 float32 计算类型。
+    固定使用 cuda 设备，计算类型默认为 float16（显存占用约为 float32 的一半）；
+    也可使用 "int8_float16" 进一步降低显存占用，或 "float32" 保持最高精度。
     """
     try:
         # 加载模型
-        model = WhisperModel(model_path, device="cuda", compute_type="float32")
-        print(f"✅ 成功加载模型: {model_path}")
+        model = WhisperModel(model_path, device="cuda", compute_type=compute_type)
+        print(f"✅ 成功加载模型: {model_path} (compute_type={compute_type})")
         return model
     except Exception as e:
         print(f"错误：无法加载模型 '{model_path}'。{e}")
         return None
     
 
-def transcribe_audio(model, audio_file):
+def transcribe_audio(pipeline, audio_file, batch_size=16):
     """
-    使用 Whisper 模型对音频文件进行转录。
+    使用 Whisper 批量推理管线对音频文件进行转录。
     使用固定的 VAD 参数和中文提示词。
+    pipeline 为包装已加载模型的 BatchedInferencePipeline，由 main() 创建一次后供所有音频复用；
+    VAD 切分出的语音片段按 batch_size 批量推理，长音频下能更充分地利用 GPU。
     """
 
     # 固定的转录参数
@@ -69,10 +106,14 @@ def transcribe_audio(model, audio_file):
     }
 
     try:
-        segments, info = model.transcribe(
+        segments, info = pipeline.transcribe(
             audio_file,
+            batch_size=batch_size,
             language="zh",  # 指定中文，提升识别精度
             word_timestamps=True,  # 启用词级时间戳
+            # 批量模式默认不预测时间戳，每个 VAD 片段（最长约 30 秒）只输出一段；
+            # 显式开启以保持与 WhisperModel.transcribe 相同的句级字幕粒度
+            without_timestamps=False,
             initial_prompt=prompt_text,
             vad_filter=True,
             vad_parameters=vad_parameters,
@@ -89,54 +130,86 @@ def format_srt_time(seconds):
     """
     将秒数转换为 SRT 时间格式 (HH:MM:SS,mmm)。
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds - int(seconds)) * 1000)
+    # 先统一换算为整数毫秒，再用 divmod 逐级拆分，避免浮点取模的精度误差
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
-def generate_srt(segments, audio_file, srt_dir):
+# SRT 文本清洗：一次扫描同时把 "..." 替换为 "…"、".." 替换为 "。"
+_DOT_RE = re.compile(r'\.{2,3}')
+_DOT_MAP = {3: '…', 2: '。'}
+
+
+def _replace_dots(match):
+    return _DOT_MAP[len(match.group())]
+
+
+def get_srt_file(audio_file, srt_dir):
+    """
+    返回音频文件对应的 SRT 字幕文件路径（文件名主体相同，后缀为 .srt）。
+    """
+    full_name = os.path.basename(audio_file)
+    return os.path.join(srt_dir, os.path.splitext(full_name)[0] + ".srt")
+
+
+def is_up_to_date(src_file, dst_file):
+    """
+    判断输出文件是否已存在且不早于输入文件，即无需重新生成。
+    """
+    return (os.path.exists(dst_file)
+            and os.path.getmtime(dst_file) >= os.path.getmtime(src_file))
+
+
+def generate_srt(segments, audio_file, srt_dir, debug=False):
     """
     处理转录结果，生成 SRT 字幕文件并保存到指定目录。
+    字幕边生成边写入文件，不在内存中保留完整的字幕内容。
+    debug 为 True 时逐段打印转录文本。
     """
     if not segments:
         print("警告：没有可供生成 SRT 的分段数据。")
         return
 
-    # 初始化变量
-    srt_content = []  # 用于存储每一段字幕的字符串
-    segment_index = 1  # SRT 序号从 1 开始
+    output_srt_file = get_srt_file(audio_file, srt_dir)
+    # 先写入临时文件，全部完成后再替换，避免中断时留下不完整的字幕文件
+    # （main() 会根据字幕文件是否存在且较新来跳过已转录的音频）
+    partial_file = output_srt_file + ".part"
 
     print("开始处理分段文本并生成字幕...")
 
-    for segment in segments:
-        # 1. 打印调试信息
-        print(f"[{segment.start:.2f}s -> {segment.end:.2f}s] {segment.text}")
-
-        # 2. 文本清洗 (用于 SRT)
-        segment_text = segment.text
-        segment_text = segment_text.replace('...', '…').replace('..', '。')
-
-        # 3. 构建 SRT 片段
-        srt_entry = (
-            f"{segment_index}\n"
-            f"{format_srt_time(segment.start)} --> {format_srt_time(segment.end)}\n"
-            f"{segment_text.strip()}\n\n"
-        )
-        srt_content.append(srt_entry)
+    try:
+        # 使用 1MB 写缓冲，减少长音频逐段写入时的系统调用次数
+        with open(partial_file, 'wb', buffering=1 << 20) as f:
+            # SRT 序号从 1 开始
+            for segment_index, segment in enumerate(segments, 1):
+                # 1. 打印调试信息
+                if debug:
+                    print(f"[{segment.start:.2f}s -> {segment.end:.2f}s] {segment.text}")
 
-        segment_index += 1
+                # 2. 文本清洗 (用于 SRT)
+                segment_text = _DOT_RE.sub(_replace_dots, segment.text)
 
-    # --- 保存文件 2: SRT 字幕文件 ---
-    full_name = os.path.basename(audio_file)
-    output_srt_file = os.path.join(srt_dir, os.path.splitext(full_name)[0] + ".srt")
-    try:
-        with open(output_srt_file, 'w', encoding='utf-8') as f:
-            f.write("".join(srt_content))
+                # 3. 构建 SRT 片段，编码为 UTF-8 后直接写入文件
+                srt_entry = (
+                    f"{segment_index}\n"
+                    f"{format_srt_time(segment.start)} --> {format_srt_time(segment.end)}\n"
+                    f"{segment_text.strip()}\n\n"
+                )
+                f.write(srt_entry.encode('utf-8'))
+        os.replace(partial_file, output_srt_file)
         print(f"✅ 已生成字幕文件：{output_srt_file}")
-    except Exception as e:
-        print(f"错误：无法保存 SRT 文件。{e}")
+    except BaseException as e:
+        # 生成失败或被中断时删除临时文件，不留下半成品
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        # Ctrl-C 等中断继续向上抛出
+        if not isinstance(e, Exception):
+            raise
+        # segments 是惰性生成的，转录（如显存不足）和写入的错误都会在这里出现
+        print(f"错误：生成 SRT 文件失败。{e}")
 
 
 
@@ -158,29 +231,47 @@ def main():
     srt_path = os.path.join(script_dir,config["srt_path"])
     audio_path = os.path.join(script_dir,config["audio_path"])
     model_path = config["model_path"]
-    audio_file = os.path.join(audio_path, "output.wav")
 
     # 2. 确保目录存在
     if not ensure_directories(srt_path, audio_path):
         print("终止：无法确保目录存在。")
         return
 
-    # 3. 初始化模型
-    model = initialize_model(model_path)
+    # 3. 查找所有待转录的音频文件
+    audio_files = get_audio_files(audio_path)
+    if not audio_files:
+        print(f"终止：在文件夹 '{audio_path}' 中未找到任何音频文件。")
+        return
+
+    # 4. 初始化模型（只加载一次，供所有音频文件共用）
+    model = initialize_model(model_path, config.get("compute_type", "float16"))
     if not model:
         print("终止：无法初始化模型。")
         return
 
-    # 4. 执行转录
-    segments, info = transcribe_audio(model, audio_file)
-    if not segments:
-        print("终止：转录失败。")
-        return
-    
-    print("检测到的语言：%s" % info.language)
+    # 批量推理管线同样只创建一次，供所有音频文件共用
+    pipeline = BatchedInferencePipeline(model=model)
+
+    print(f"找到 {len(audio_files)} 个音频文件，开始逐个转录...")
+
+    for idx, audio_file in enumerate(audio_files, 1):
+        # 字幕文件已存在且比音频新，说明已转录过，跳过
+        if is_up_to_date(audio_file, get_srt_file(audio_file, srt_path)):
+            print(f"\n[{idx}/{len(audio_files)}] 跳过: {audio_file}（已存在最新的字幕文件）")
+            continue
+
+        print(f"\n[{idx}/{len(audio_files)}] 正在转录: {audio_file}")
+
+        # 5. 执行转录
+        segments, info = transcribe_audio(pipeline, audio_file, config.get("batch_size", 16))
+        if not segments:
+            print(f"跳过：转录失败。{audio_file}")
+            continue
+
+        print("检测到的语言：%s" % info.language)
 
-    # 5. 生成 SRT 字幕
-    generate_srt(segments, audio_file, srt_path)
+        # 6. 生成 SRT 字幕
+        generate_srt(segments, audio_file, srt_path, debug=config.get("debug", False))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
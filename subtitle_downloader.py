@@ -1,6 +1,27 @@
-import json,os
+import json,os,threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import yt_dlp
 
+# 优先使用 C 实现的 orjson 解析配置，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 并发获取视频信息时使用的最大线程数
+PROBE_WORKERS = 8
+
+@lru_cache(maxsize=None)
+def _read_config(config_path, mtime):
+    """
+    打开并解析JSON配置文件，供 load_config() 调用。
+    以 (config_path, mtime) 为键缓存，文件未变化时不会重复解析。
+    """
+    with open(config_path, 'rb') as f:
+        return _json_loads(f.read())
+
 def load_config(config_path):
     """
     从指定路径读取并解析JSON配置文件。
@@ -28,8 +49,7 @@ def load_config(config_path):
         如果文件不存在或JSON格式无效，程序将直接退出并打印错误信息。
     """
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = _read_config(config_path, os.path.getmtime(config_path))
         print(f"配置从 '{config_path}' 加载成功。")
         return config
     except FileNotFoundError:
@@ -40,6 +60,57 @@ def load_config(config_path):
         exit(1)
 
 
+# 按下载选项复用的 YoutubeDL 实例。构造实例需要加载提取器、读取cookies，
+# 开销较大；实例不保证线程安全，因此每个线程各自持有一份。
+_ydl_local = threading.local()
+_ydl_instances = []
+_ydl_instances_lock = threading.Lock()
+
+def _get_ydl(ydl_opts):
+    """
+    返回当前线程中与 ydl_opts 对应的 YoutubeDL 实例，不存在时创建并缓存。
+    """
+    instances = getattr(_ydl_local, 'instances', None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+    
+    key = repr(sorted(ydl_opts.items()))
+    ydl = instances.get(key)
+    if ydl is None:
+        ydl = instances[key] = yt_dlp.YoutubeDL(ydl_opts)
+        with _ydl_instances_lock:
+            _ydl_instances.append(ydl)
+    return ydl
+
+def _close_ydls():
+    """
+    关闭所有缓存的 YoutubeDL 实例（会同时保存cookies等状态）。
+    """
+    with _ydl_instances_lock:
+        for ydl in _ydl_instances:
+            ydl.close()
+        _ydl_instances.clear()
+
+
+def _extract_info(url, cookiefile):
+    """
+    仅提取指定URL的视频信息，不下载任何文件。
+    返回的信息字典会交给 download_item() 直接用于下载，避免再次请求网络。
+    """
+    # 配置yt-dlp仅提取信息，不下载任何文件
+    ydl_opts = {
+        'quiet': True,         # 减少控制台输出
+        'no_warnings': True,   # 不显示警告
+        'listsubtitles': True,
+    }
+    
+    # 添加cookiefile参数（如果需要）
+    if cookiefile is not None:
+        ydl_opts['cookiefile'] = cookiefile
+    
+    ydl = _get_ydl(ydl_opts)
+    return ydl.extract_info(url, download=False)
+
 def get_video_info(url, preferred_languages, config):
     """
     获取指定URL的视频信息，并检测配置列表中第一个可用的字幕语言。
@@ -54,43 +125,22 @@ def get_video_info(url, preferred_languages, config):
                info_dict: 包含视频信息的字典
                selected_lang: 从preferred_languages中找到的第一个可用语言，如无匹配则为None
     """
-    # 配置yt-dlp仅提取信息，不下载任何文件
-    ydl_opts = {
-        'quiet': True,         # 减少控制台输出
-        'no_warnings': True,   # 不显示警告
-        'listsubtitles': True,
-    }
-    
-    # 添加cookiefile参数（如果需要）
-    if 'cookiefile' in config:
-        ydl_opts['cookiefile'] = config['cookiefile']
-    
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            # print(info)
-            
-            # 获取视频的所有字幕（手动+自动）
-            all_subtitles = {}
-            
-            # 合并手动字幕
-            subtitles = info.get('subtitles', {})
-            if subtitles:
-                all_subtitles.update(subtitles)
-            
-            # 合并自动生成的字幕
-            auto_captions = info.get('automatic_captions', {})
-            if auto_captions:
-                all_subtitles.update(auto_captions)
-            
-            # 在偏好语言列表中查找第一个可用的语言
-            selected_lang = None
-            for lang in preferred_languages:
-                if lang in all_subtitles:
-                    selected_lang = lang
-                    break
-            
-            return info, selected_lang
+        info = _extract_info(url, config.get('cookiefile'))
+        # print(info)
+        
+        # 获取视频的所有字幕（手动+自动）
+        subtitles = info.get('subtitles') or {}
+        auto_captions = info.get('automatic_captions') or {}
+        
+        # 在偏好语言列表中查找第一个可用的语言，直接在两类字幕中查找，无需合并
+        selected_lang = next(
+            (lang for lang in preferred_languages
+             if lang in subtitles or lang in auto_captions),
+            None,
+        )
+        
+        return info, selected_lang
             
     except Exception as e:
         # 捕获所有异常，例如网络错误、不支持的URL、视频不存在等
@@ -145,21 +195,32 @@ def generate_download_options(config, selected_lang):
 
     return ydl_opts
 
-def download_item(url, ydl_opts):
+def download_item(url, ydl_opts, info=None):
     """
     使用给定的下载选项，对单个URL执行下载操作。
 
     参数:
         url (str): 要下载的视频URL。
         ydl_opts (dict): 由 generate_download_options() 生成的下载选项。
+        info (dict|None): get_video_info() 已获取的视频信息。提供时直接基于该信息下载，
+                          不再重新提取；为None时按URL重新提取后下载。
 
     返回:
         bool: 如果下载成功（或按配置成功跳过）返回True，否则返回False。
     """
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # 调用download方法执行下载流程
-            # 注意：如果 ydl_opts 中设置了 'skip_download': True，则此处不会下载音视频流
+        ydl = _get_ydl(ydl_opts)
+        # 调用download方法执行下载流程
+        # 注意：如果 ydl_opts 中设置了 'skip_download': True，则此处不会下载音视频流
+        if info is not None:
+            try:
+                ydl.process_ie_result(info, download=True)
+            except yt_dlp.utils.DownloadError as e:
+                # 预先获取的信息可能已失效（例如格式地址过期），与 yt-dlp 的
+                # download_with_info_file 一样，回退为按URL重新提取后下载
+                print(f"    使用已获取的视频信息下载失败，重新提取后重试: {e}")
+                ydl.download([url])
+        else:
             ydl.download([url])
         print(f"    处理完成: {url}")
         return True
@@ -225,68 +286,82 @@ def main():
     程序的主函数，协调整个下载流程：
     1. 加载配置文件
     2. 遍历配置中的URL列表
-    3. 对每个URL，获取其信息并检测偏好语言列表中的第一个可用字幕
+    3. 并发获取每个URL的信息并检测偏好语言列表中的第一个可用字幕
     4. 根据检测到的匹配语言生成对应的下载选项
     5. 使用生成的选项执行下载
     """
     # 1. 加载配置
     config = load_config('config.json')
     
-    # 从配置中获取目标URL列表
-    target_urls = config.get('urls', [])
-    if not target_urls:
-        print("配置中未找到 'urls' 列表或列表为空。程序退出。")
-        return
-    # 处理URL列表，区分合集和单视频
-    processed_urls = []
-    for url in target_urls:
-        if is_collection(url):  # 判断是否为合集
-            try:
-                video_list = extract_videos_from_collection(url)  # 从合集提取视频列表
-                processed_urls.extend(video_list)
-                print(f"合集 URL '{url}' 已处理，提取到 {len(video_list)} 个视频")
-            except Exception as e:
-                print(f"处理合集 '{url}' 时出错: {e}")
-                continue
-        else:  # 单视频地址
-            processed_urls.append(url)
+    try:
+        # 从配置中获取目标URL列表
+        target_urls = config.get('urls', [])
+        if not target_urls:
+            print("配置中未找到 'urls' 列表或列表为空。程序退出。")
+            return
+        # 处理URL列表，区分合集和单视频
+        processed_urls = []
+        for url in target_urls:
+            if is_collection(url):  # 判断是否为合集
+                try:
+                    video_list = extract_videos_from_collection(url)  # 从合集提取视频列表
+                    processed_urls.extend(video_list)
+                    print(f"合集 URL '{url}' 已处理，提取到 {len(video_list)} 个视频")
+                except Exception as e:
+                    print(f"处理合集 '{url}' 时出错: {e}")
+                    continue
+            else:  # 单视频地址
+                processed_urls.append(url)
 
-    # 使用处理后的URL列表继续后续操作
-    print(f"共获取到 {len(processed_urls)} 个待处理视频")
-    # 获取用户偏好的语言列表
-    preferred_languages = config.get('subtitle_langs', ['en'])
-    print(f"偏好语言顺序: {preferred_languages}")
+        # 去除重复的URL（例如同一视频既单独列出又出现在合集中），保持原顺序
+        processed_urls = list(dict.fromkeys(processed_urls))
     
+        # 使用处理后的URL列表继续后续操作
+        print(f"共获取到 {len(processed_urls)} 个待处理视频")
+        # 获取用户偏好的语言列表
+        preferred_languages = config.get('subtitle_langs', ['en'])
+        print(f"偏好语言顺序: {preferred_languages}")
     
-    # 2. 遍历每个URL
-    for idx, url in enumerate(processed_urls, 1):
-        print(f"\n[{idx}/{len(processed_urls)}] 处理URL: {url}")
-        
-        # 3. 获取视频信息，检测偏好列表中第一个可用的字幕语言
-        print(f"  步骤1: 正在获取视频信息并检测字幕(偏好语言: {preferred_languages})...")
-        video_info, selected_lang = get_video_info(url, preferred_languages, config)  # 传入config
+    
+        # 2. 并发获取所有视频的信息，检测偏好列表中第一个可用的字幕语言
+        #    获取信息主要耗时在网络往返上，用线程池让多个请求同时进行
+        print(f"\n正在并发获取视频信息并检测字幕(偏好语言: {preferred_languages})...")
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            probes = list(executor.map(
+                lambda url: get_video_info(url, preferred_languages, config),  # 传入config
+                processed_urls,
+            ))
+    
+        # 3. 按原顺序遍历每个URL的检测结果并下载
+        for idx, (url, (video_info, selected_lang)) in enumerate(zip(processed_urls, probes), 1):
+            print(f"\n[{idx}/{len(processed_urls)}] 处理URL: {url}")
+            print("  步骤1: 视频信息获取完成。")
         
-        if video_info is None:
-            print(f"  警告: 无法获取视频信息，跳过此URL。")
-            continue
+            if video_info is None:
+                print(f"  警告: 无法获取视频信息，跳过此URL。")
+                continue
         
-        if selected_lang:
-            print(f"  步骤2: 字幕检测完成。匹配到语言: {selected_lang}")
-        else:
-            print(f"  步骤2: 字幕检测完成。未找到偏好语言列表中的字幕")
+            if selected_lang:
+                print(f"  步骤2: 字幕检测完成。匹配到语言: {selected_lang}")
+            else:
+                print(f"  步骤2: 字幕检测完成。未找到偏好语言列表中的字幕")
         
-        # 4. 根据匹配到的语言生成下载选项
-        print("  步骤3: 生成下载选项...")
-        ydl_opts = generate_download_options(config, selected_lang)
+            # 4. 根据匹配到的语言生成下载选项
+            print("  步骤3: 生成下载选项...")
+            ydl_opts = generate_download_options(config, selected_lang)
         
-        # 5. 执行下载
-        print("  步骤4: 开始下载...")
-        success = download_item(url, ydl_opts)
+            # 5. 执行下载
+            print("  步骤4: 开始下载...")
+            # 复用步骤1获取的视频信息，避免下载前再次提取
+            success = download_item(url, ydl_opts, video_info)
         
-        if not success:
-            print(f"  警告: URL处理过程中可能出现问题: {url}")
+            if not success:
+                print(f"  警告: URL处理过程中可能出现问题: {url}")
     
-    print("\n所有任务处理完毕。")
+        print("\n所有任务处理完毕。")
+    finally:
+        # 无论正常结束、出错还是被中断，都关闭复用的 YoutubeDL 实例（同时保存cookies）
+        _close_ydls()
 
 # 程序的执行入口
 if __name__ == "__main__":